@@ -5,7 +5,13 @@ A conversational agent for qualifying catering leads.
 
 __version__ = "0.1.0"
 
-# This allows imports like: from tools_agent.meal_outpost import graph
-from tools_agent.meal_outpost.agent import graph
+__all__ = ["graph", "__version__"]
 
-__all__ = ["graph", "__version__"]
\ No newline at end of file
+
+def __getattr__(name):
+    # This allows imports like: from tools_agent.meal_outpost import graph
+    # Resolved lazily so importing the tools alone doesn't build the graph
+    if name == "graph":
+        from tools_agent.meal_outpost.agent import graph
+        return graph
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
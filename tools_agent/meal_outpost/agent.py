@@ -3,37 +3,56 @@ Meal Outpost Lead Qualification Agent - Free-flowing Conversation
 Natural conversation flow with tools called as needed.
 """
 
+import json
+import logging
 import os
-from typing import TypedDict, Annotated, Sequence, Literal
-from langchain_core.messages import BaseMessage, SystemMessage, HumanMessage, AIMessage
+from operator import itemgetter
+from functools import cache
+from typing import TypedDict, Annotated, AsyncIterator, List, Mapping, NotRequired, Optional, Sequence, Literal, Union
+from langchain_core.caches import InMemoryCache
+from langchain_core.messages import (
+    AIMessage,
+    BaseMessage,
+    SystemMessage,
+    HumanMessage,
+    get_buffer_string,
+)
 from langchain_openai import ChatOpenAI
+from langchain_core.runnables import RunnableConfig, RunnableLambda, RunnableParallel
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.constants import TAG_NOSTREAM
 from langgraph.graph import StateGraph, END
 from langgraph.graph.message import add_messages
+from langgraph.graph.state import CompiledStateGraph
 from langgraph.prebuilt import ToolNode
 
 # Import tools from tools.py
 from tools_agent.meal_outpost.tools import (
     check_service_area,
     check_order_minimum,
-    send_lead_notification
+    send_lead_notification,
+    flush_lead_notifications,
 )
 
+logger = logging.getLogger(__name__)
+
 # ============================================================================
 # ENVIRONMENT VALIDATION
 # ============================================================================
 
+@cache
 def validate_environment():
-    """Ensure required environment variables are set."""
+    """Ensure required environment variables are set.
+    
+    Runs once, the first time the chat models are created.
+    """
     openai_key = os.getenv("OPENAI_API_KEY")
     if not openai_key:
         raise ValueError(
             "❌ OPENAI_API_KEY not found in environment.\n"
             "Please create a .env file with: OPENAI_API_KEY=your_key_here"
         )
-    print("✅ Environment variables validated")
-
-# Validate on import
-validate_environment()
+    logger.debug("Environment variables validated")
 
 # ============================================================================
 # STATE DEFINITION
@@ -42,6 +61,10 @@ validate_environment()
 class ConversationState(TypedDict):
     """The state of our conversation with the user."""
     messages: Annotated[Sequence[BaseMessage], add_messages]
+    summary: NotRequired[str]
+    """Rolling summary of messages that have left the prompt window"""
+    summarized_count: NotRequired[int]
+    """How many leading messages are already folded into the summary"""
 
 # ============================================================================
 # SYSTEM PROMPT - YOUR ORIGINAL WITH IDENTITY ENHANCEMENTS
@@ -140,34 +163,243 @@ Once you have location, headcount, timing, and use case:
 ===== REMEMBER =====
 You are MO from Meal Outpost. You are NOT a generic AI assistant. Stay in character at all times and always introduce yourself properly. Ask ONE question at a time for a natural conversation flow."""
 
+# Built once and reused on every turn; the prompt never changes at runtime
+_SYSTEM_MESSAGE = SystemMessage(content=SYSTEM_PROMPT)
+
+# The tool schemas plus SYSTEM_PROMPT are a byte-identical prefix on every
+# request, which OpenAI caches automatically once it passes 1024 tokens. A shared
+# cache key routes those requests together so the cached prefix gets reused.
+# Keep per-conversation content out of SYSTEM_PROMPT to preserve the hit rate.
+PROMPT_CACHE_KEY = "meal-outpost-mo"
+
+# ============================================================================
+# CONVERSATION MEMORY - BOUNDED PROMPT WINDOW
+# ============================================================================
+
+# Messages sent verbatim to the LLM each turn; older ones are summarized
+MAX_HISTORY_MESSAGES = 20
+
+# Messages that leave the window are folded into the summary in chunks of at
+# least this many, so long conversations don't pay a summary call every turn
+SUMMARY_CHUNK_MESSAGES = 10
+
+SUMMARY_PROMPT = """You maintain running notes on a catering lead conversation for MO, Meal Outpost's assistant.
+Update the existing summary with the new messages. Keep every fact gathered so far: location, headcount, timing, use case, food preferences, contact details, and tool results.
+Reply with the updated summary only, in a few short sentences."""
+
+_SUMMARY_SYSTEM_MESSAGE = SystemMessage(content=SUMMARY_PROMPT)
+
+# Summaries run at temperature 0, so an identical request (e.g. replaying or
+# re-running a thread) can safely reuse the earlier response
+_SUMMARY_CACHE = InMemoryCache(maxsize=1024)
+
+class _ContentKeyedCache(InMemoryCache):
+    """InMemoryCache that ignores message ids when matching prompts.
+    
+    Chat models key the cache on the serialized messages, ids included, and
+    every run gives its messages fresh ids. Dropping them lets a replayed
+    conversation match the earlier one.
+    """
+    
+    @staticmethod
+    def _key(prompt: str) -> str:
+        messages = json.loads(prompt)
+        for message in messages:
+            message.get("kwargs", {}).pop("id", None)
+        return json.dumps(messages, sort_keys=True)
+    
+    def lookup(self, prompt, llm_string):
+        return super().lookup(self._key(prompt), llm_string)
+    
+    def update(self, prompt, llm_string, return_val):
+        super().update(self._key(prompt), llm_string, return_val)
+
+
+# Opt-in cache for the conversation model, keyed on the prompt's content, tools
+# and model settings. Meant for eval and demo replays: with it on, a repeated
+# conversation gets the same reply instead of a fresh sample.
+_RESPONSE_CACHE = _ContentKeyedCache(maxsize=1024)
+
+
+def _summary_request(summary: str, messages: Sequence[BaseMessage]) -> List[BaseMessage]:
+    """Prompt that folds messages leaving the window into the rolling summary."""
+    return [
+        _SUMMARY_SYSTEM_MESSAGE,
+        HumanMessage(
+            content=f"Existing summary:\n{summary or '(none)'}\n\n"
+            f"New messages:\n{get_buffer_string(messages)}"
+        ),
+    ]
+
+
+def _agent_prompt(summary: str, messages: Sequence[BaseMessage]) -> List[BaseMessage]:
+    """System prompt, then the summary if there is one, then recent history."""
+    # CRITICAL: ALWAYS prepend system message to ensure it's included
+    prompt = [_SYSTEM_MESSAGE]
+    if summary:
+        prompt.append(SystemMessage(content=f"Summary of the earlier conversation: {summary}"))
+    prompt += messages
+    return prompt
+
+
+def _plan_turn(state: ConversationState):
+    """Decide what the summary needs this turn.
+    
+    Older turns are folded into the summary a chunk at a time; anything not
+    folded yet still goes in verbatim, so the prompt stays bounded.
+    
+    Returns:
+        (messages to fold before the reply, messages to fold alongside it,
+        index where the verbatim history starts, new summarized_count)
+    """
+    messages = state["messages"]
+    start = _window_start(messages)
+    summarized_count = state.get("summarized_count", 0)
+    pending = messages[summarized_count:start]
+    
+    # Far behind (e.g. a caller that doesn't carry the summary forward):
+    # catch up first so this prompt stays bounded too
+    if len(pending) >= 2 * SUMMARY_CHUNK_MESSAGES:
+        return pending, [], start, start
+    
+    # A full chunk has left the window, fold it for the next turn
+    if len(pending) >= SUMMARY_CHUNK_MESSAGES:
+        return [], pending, summarized_count, start
+    return [], [], summarized_count, summarized_count
+
+
+def _window_start(messages: Sequence[BaseMessage]) -> int:
+    """Index of the first message to send verbatim.
+    
+    The window always opens on a user message so tool calls are never
+    separated from their results.
+    """
+    start = max(len(messages) - MAX_HISTORY_MESSAGES, 0)
+    for i in range(start, len(messages)):
+        if isinstance(messages[i], HumanMessage):
+            return i
+    
+    # No user message inside the window, keep the whole current turn
+    for i in range(start - 1, -1, -1):
+        if isinstance(messages[i], HumanMessage):
+            return i
+    return 0
+
+# ============================================================================
+# MODELS AND TOOLS - SHARED BY EVERY GRAPH BUILD
+# ============================================================================
+
+_TOOLS = (check_service_area, check_order_minimum, send_lead_notification)
+
+_TOOL_NODE = ToolNode(_TOOLS)
+
+
+@cache
+def _get_models():
+    """Create the chat models once, after the environment has been validated.
+    
+    Returns:
+        The tool-bound conversation model and the summary model
+    """
+    validate_environment()
+    
+    llm = ChatOpenAI(
+        model="gpt-4o",
+        temperature=0.5,
+        # Sent in the request body, so older openai SDKs that don't know
+        # the parameter pass it through instead of rejecting it
+        extra_body={"prompt_cache_key": PROMPT_CACHE_KEY},
+        cache=_RESPONSE_CACHE if os.getenv("MEAL_OUTPOST_LLM_CACHE") else None,
+    )
+    # Summaries are internal, keep their tokens out of streamed replies
+    summary_llm = ChatOpenAI(
+        model="gpt-4o-mini", temperature=0, cache=_SUMMARY_CACHE
+    ).with_config(tags=[TAG_NOSTREAM])
+    return llm.bind_tools(_TOOLS), summary_llm
+
 # ============================================================================
 # BUILD AGENT - NEW IMPLEMENTATION THAT GUARANTEES SYSTEM PROMPT
 # ============================================================================
 
-def build_graph():
-    """Build the conversational agent with guaranteed system prompt injection."""
+def build_graph(checkpointer: Optional[BaseCheckpointSaver] = None):
+    """Build the conversational agent with guaranteed system prompt injection.
     
-    print("🔨 Building Meal Outpost agent...")
+    The graph without a checkpointer is cached, so repeat calls share a single
+    instance. Each call with a checkpointer compiles a graph bound to it.
     
-    # Create LLM with tools
-    tools = [check_service_area, check_order_minimum, send_lead_notification]
-    llm = ChatOpenAI(model="gpt-4o", temperature=0.5)
-    llm_with_tools = llm.bind_tools(tools)
+    Args:
+        checkpointer: Optional checkpointer used to persist state between turns.
+            With one, callers pass a thread_id and send only the new message
+            each turn. The LangGraph server supplies its own, so the exported
+            graph is built without.
+    """
+    if checkpointer is None:
+        return _build_default_graph()
+    return _compile_graph(checkpointer)
+
+
+@cache
+def _build_default_graph():
+    """The checkpointer-less graph, compiled once and shared."""
+    return _compile_graph(None)
+
+
+def _compile_graph(checkpointer: Optional[BaseCheckpointSaver]):
+    """Assemble and compile the agent graph."""
+    logger.info("🔨 Building Meal Outpost agent...")
     
-    # Create tool node
-    tool_node = ToolNode(tools)
+    llm_with_tools, summary_llm = _get_models()
     
-    # Define the agent node
+    # Folds a chunk into the summary while the reply is generated, so the
+    # summary never delays the reply (threads for invoke, gather for ainvoke)
+    reply_and_fold = RunnableParallel(
+        reply=itemgetter("prompt") | llm_with_tools,
+        summary=itemgetter("fold") | summary_llm,
+    )
+    
+    # Define the agent node, with a native path for sync and async callers
     def call_model(state: ConversationState):
         """Call the LLM with system prompt ALWAYS included."""
-        messages = state["messages"]
+        catch_up, fold, verbatim_from, start = _plan_turn(state)
+        summary = state.get("summary", "")
         
-        # CRITICAL: ALWAYS prepend system message to ensure it's included
-        full_messages = [SystemMessage(content=SYSTEM_PROMPT)] + list(messages)
+        if catch_up:
+            summary = summary_llm.invoke(_summary_request(summary, catch_up)).content
         
-        # Call LLM with complete message history including system prompt
-        response = llm_with_tools.invoke(full_messages)
+        prompt = _agent_prompt(summary, state["messages"][verbatim_from:])
+        if fold:
+            result = reply_and_fold.invoke(
+                {"prompt": prompt, "fold": _summary_request(summary, fold)}
+            )
+            response, summary = result["reply"], result["summary"].content
+        else:
+            response = llm_with_tools.invoke(prompt)
         
+        if catch_up or fold:
+            return {"messages": [response], "summary": summary, "summarized_count": start}
+        return {"messages": [response]}
+    
+    async def acall_model(state: ConversationState):
+        """Call the LLM with system prompt ALWAYS included."""
+        catch_up, fold, verbatim_from, start = _plan_turn(state)
+        summary = state.get("summary", "")
+        
+        if catch_up:
+            summary = (await summary_llm.ainvoke(_summary_request(summary, catch_up))).content
+        
+        # When the graph is streamed (stream_mode="messages" or astream_events)
+        # the reply streams from OpenAI and tokens reach the client as they arrive
+        prompt = _agent_prompt(summary, state["messages"][verbatim_from:])
+        if fold:
+            result = await reply_and_fold.ainvoke(
+                {"prompt": prompt, "fold": _summary_request(summary, fold)}
+            )
+            response, summary = result["reply"], result["summary"].content
+        else:
+            response = await llm_with_tools.ainvoke(prompt)
+        
+        if catch_up or fold:
+            return {"messages": [response], "summary": summary, "summarized_count": start}
         return {"messages": [response]}
     
     # Define routing logic
@@ -176,7 +408,7 @@ def build_graph():
         last_message = state["messages"][-1]
         
         # If LLM wants to use tools, route to tools node
-        if hasattr(last_message, "tool_calls") and last_message.tool_calls:
+        if getattr(last_message, "tool_calls", None):
             return "tools"
         
         # Otherwise, end the turn
@@ -186,8 +418,8 @@ def build_graph():
     workflow = StateGraph(ConversationState)
     
     # Add nodes
-    workflow.add_node("agent", call_model)
-    workflow.add_node("tools", tool_node)
+    workflow.add_node("agent", RunnableLambda(call_model, afunc=acall_model, name="agent"))
+    workflow.add_node("tools", _TOOL_NODE)
     
     # Set entry point
     workflow.set_entry_point("agent")
@@ -203,13 +435,117 @@ def build_graph():
     )
     workflow.add_edge("tools", "agent")
     
-    print("✅ Agent built successfully!")
-    return workflow.compile()
+    logger.info("✅ Agent built successfully!")
+    return workflow.compile(checkpointer=checkpointer)
+
+# ============================================================================
+# BATCH QUALIFICATION
+# ============================================================================
+
+def _graph_input(
+    conversation: Union[Sequence[BaseMessage], ConversationState],
+) -> ConversationState:
+    """Graph input for bare messages, or for a state from an earlier run."""
+    if isinstance(conversation, Mapping):
+        return {**conversation, "messages": list(conversation["messages"])}
+    return {"messages": list(conversation)}
+
+
+async def batch_qualify(
+    conversations: Sequence[Union[Sequence[BaseMessage], ConversationState]],
+    max_concurrency: int = 16,
+) -> List[ConversationState]:
+    """Run many independent lead conversations through the agent concurrently.
+    
+    Useful for eval runs or qualifying a backlog of leads, where awaiting each
+    conversation in turn would serialize every OpenAI round-trip.
+    
+    Args:
+        conversations: Message history for each lead, or a state returned by
+            an earlier call with the new messages appended. Passing the state
+            back carries the rolling summary forward instead of rebuilding it.
+        max_concurrency: Maximum number of conversations in flight at once
+        
+    Returns:
+        Final state of each conversation, in input order, once any lead
+        notifications they queued have been sent
+    """
+    states = await build_graph().abatch(
+        [_graph_input(conversation) for conversation in conversations],
+        config={"max_concurrency": max_concurrency},
+    )
+    
+    # Leads are sent in the background; don't let them die with the loop
+    await flush_lead_notifications()
+    return states
+
+# ============================================================================
+# STREAMING
+# ============================================================================
+
+async def stream_reply(
+    conversation: Union[Sequence[BaseMessage], ConversationState],
+    config: Optional[RunnableConfig] = None,
+    agent: Optional[CompiledStateGraph] = None,
+    final_state: Optional[dict] = None,
+) -> AsyncIterator[str]:
+    """Yield the agent's reply text as the model generates it.
+    
+    Lets a chat client render the first tokens right away instead of waiting
+    for the whole turn. Tool-call chunks carry no text and are skipped, the
+    tools still run before the final reply starts streaming. A reply served
+    from the response cache arrives as a single piece.
+    
+    Keep the rolling summary between turns, either with a checkpointed agent
+    or by passing final_state back in. Bare message histories without one
+    rebuild the summary from scratch, and once they are long that summary
+    call runs before the first token on every turn.
+    
+    Args:
+        conversation: Message history, or a state from an earlier turn with
+            the new message appended. Only the new message when the agent
+            has a checkpointer.
+        config: Optional run config, e.g. carrying a thread_id
+        agent: Compiled graph to run, e.g. build_graph(checkpointer) to keep
+            history per thread. Defaults to the shared graph without one.
+        final_state: Optional dict, filled with the conversation's state
+            (messages, summary, summarized_count) once the turn finishes
+        
+    Yields:
+        Pieces of the reply text, in order. The generator finishes once any
+        lead notification the turn queued has been sent.
+    """
+    if agent is None:
+        agent = build_graph()
+    
+    state = None
+    async for mode, payload in agent.astream(
+        _graph_input(conversation), config, stream_mode=["messages", "values"]
+    ):
+        if mode == "values":
+            state = payload
+            continue
+        
+        # Streamed replies arrive as AIMessageChunks, cached ones whole
+        chunk, metadata = payload
+        if (
+            metadata.get("langgraph_node") == "agent"
+            and isinstance(chunk, AIMessage)
+            and chunk.content
+        ):
+            yield chunk.content
+    
+    # The reply is out, now make sure queued leads are sent before returning
+    await flush_lead_notifications()
+    
+    if final_state is not None and state is not None:
+        final_state.clear()
+        final_state.update(state)
 
 # Create the compiled graph
 try:
     graph = build_graph()
-    print("✅ Graph compiled and ready!")
+    logger.info("✅ Graph compiled and ready!")
 except Exception as e:
-    print(f"❌ Error building graph: {e}")
+    logger.error("❌ Error building graph: %s", e)
     raise
\ No newline at end of file
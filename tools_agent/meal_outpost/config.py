@@ -1,9 +1,9 @@
 # tools_agent/meal_outpost/config.py
 import os
-from typing import List
-from pydantic import BaseModel, Field
+from dataclasses import dataclass, field
 
-class AgentConfig(BaseModel):
+@dataclass(slots=True)
+class AgentConfig:
     """Configuration for the Meal Outpost agent."""
     
     # Model configuration  
@@ -16,7 +16,7 @@ class AgentConfig(BaseModel):
     sales_email: str = "dylan@mealoutpost.com"
     
     # API keys from environment
-    openai_api_key: str = Field(default_factory=lambda: os.getenv("OPENAI_API_KEY", ""))
+    openai_api_key: str = field(default_factory=lambda: os.getenv("OPENAI_API_KEY", ""))
 
 # Global config instance
 config = AgentConfig()
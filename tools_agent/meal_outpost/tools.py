@@ -3,12 +3,20 @@ Tools for the Meal Outpost Lead Qualification Agent
 These functions provide data access and business logic.
 """
 
-from langchain_core.tools import tool
-from typing import Dict, List, Optional
-from pydantic import BaseModel
+from langchain_core.tools import StructuredTool
+from typing import Dict, List, Mapping, Optional, Sequence, Set, Tuple
+import asyncio
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from functools import cache, lru_cache
 import json
+import logging
 from pathlib import Path
 import re
+from types import MappingProxyType
+import weakref
+
+logger = logging.getLogger(__name__)
 
 # ============================================================================
 # LOAD DATA FROM JSON
@@ -21,26 +29,204 @@ def load_restaurant_data():
         if not data_file.exists():
             raise FileNotFoundError(f"Restaurant data file not found at {data_file}")
         
-        with open(data_file, "r") as f:
-            return json.load(f)
+        return json.loads(data_file.read_bytes())
     except Exception as e:
-        print(f"ERROR loading restaurant data: {e}")
+        logger.error("ERROR loading restaurant data: %s", e)
         raise
 
-# Load data once at module level
+# Load data once at module level. The data is read-only, so the top-level
+# lists become tuples and an accidental mutation fails loudly.
 try:
     _restaurant_data = load_restaurant_data()
-    SERVICE_AREAS_JSON = _restaurant_data["service_areas"]
-    RESTAURANT_PARTNERS_JSON = _restaurant_data["restaurant_partners"]
+    SERVICE_AREAS_JSON = tuple(_restaurant_data["service_areas"])
+    RESTAURANT_PARTNERS_JSON = tuple(_restaurant_data["restaurant_partners"])
 except Exception as e:
-    print(f"CRITICAL ERROR: Could not load restaurant data: {e}")
+    logger.critical("CRITICAL ERROR: Could not load restaurant data: %s", e)
     raise
 
+# ============================================================================
+# LOOKUP TABLES (built once at import, reused by every tool call)
+# ============================================================================
+
+MINIMUM_ORDER_SIZE = 20
+
+_CAPACITY_RANK = {"small": 1, "medium": 2, "large": 3}
+
+_EMAIL_RE = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b')
+
+# Frequencies that count as a recurring order ("bi-weekly" matches too)
+_RECURRING_FREQUENCY_RE = re.compile(r"recurring|daily|weekly|monthly")
+
+# US phone numbers
+_PHONE_RE = re.compile(r'\b(?:\+?1[-.]?)?\(?([0-9]{3})\)?[-.]?([0-9]{3})[-.]?([0-9]{4})\b')
+
+_SERVICE_AREA_BY_CITY = {area['city'].lower(): area for area in SERVICE_AREAS_JSON}
+
+# Shorthand and covered neighborhoods (see the areas' notes) -> canonical
+# city, all lowercase
+_CITY_ALIASES = {
+    "nyc": "new york city",
+    "new york": "new york city",
+    "manhattan": "new york city",
+    "brooklyn": "new york city",
+    "queens": "new york city",
+    "la": "los angeles",
+    "sf": "san francisco",
+    "oakland": "san francisco",
+    "berkeley": "san francisco",
+    "dc": "washington",
+    "arlington": "washington",
+}
+
+# Aliases that sit across a state line from their service area
+_ALIAS_STATES = {"arlington": "VA"}
+
+# Every name that resolves to a service area -> canonical city. Aliases whose
+# city isn't in the data file (any more) are left out.
+_SERVICE_AREA_NAMES = {
+    **{name: name for name in _SERVICE_AREA_BY_CITY},
+    **{
+        alias: name
+        for alias, name in _CITY_ALIASES.items()
+        if name in _SERVICE_AREA_BY_CITY
+    },
+}
+
+# A whole service-area name followed by a state, e.g. "san francisco, ca".
+# One alternation over all names, longest first, resolved in one regex pass.
+_SERVICE_CITY_RE = re.compile(
+    r"("
+    + "|".join(
+        re.escape(name) for name in sorted(_SERVICE_AREA_NAMES, key=len, reverse=True)
+    )
+    + r")\s*,\s*([a-z .]+?)\.?"
+)
+
+# Lowercase state names by postal code, so "Columbus, Ohio" and
+# "Columbus, OH" are both checked against the area's state
+_US_STATE_NAMES = {
+    "AL": "alabama", "AK": "alaska", "AZ": "arizona", "AR": "arkansas",
+    "CA": "california", "CO": "colorado", "CT": "connecticut", "DE": "delaware",
+    "DC": "district of columbia", "FL": "florida", "GA": "georgia", "HI": "hawaii",
+    "ID": "idaho", "IL": "illinois", "IN": "indiana", "IA": "iowa",
+    "KS": "kansas", "KY": "kentucky", "LA": "louisiana", "ME": "maine",
+    "MD": "maryland", "MA": "massachusetts", "MI": "michigan", "MN": "minnesota",
+    "MS": "mississippi", "MO": "missouri", "MT": "montana", "NE": "nebraska",
+    "NV": "nevada", "NH": "new hampshire", "NJ": "new jersey", "NM": "new mexico",
+    "NY": "new york", "NC": "north carolina", "ND": "north dakota", "OH": "ohio",
+    "OK": "oklahoma", "OR": "oregon", "PA": "pennsylvania", "RI": "rhode island",
+    "SC": "south carolina", "SD": "south dakota", "TN": "tennessee", "TX": "texas",
+    "UT": "utah", "VT": "vermont", "VA": "virginia", "WA": "washington",
+    "WV": "west virginia", "WI": "wisconsin", "WY": "wyoming",
+}
+
+def _partner_summary(restaurant: Dict) -> Dict:
+    """Shape a restaurant the way get_restaurant_partners reports it."""
+    return {
+        "name": restaurant['name'],
+        "cuisine": ", ".join(restaurant['cuisine_type']),
+        "description": restaurant['description'],
+        "capacity": restaurant['capacity'],
+        "dietary_options": ", ".join(restaurant['dietary_options'])
+    }
+
+
+# Result summary and lowercased filter fields per restaurant, so queries
+# never re-normalize or re-join them:
+# (summary, city, cuisines, dietary options, capacity rank)
+_PARTNER_FILTER_KEYS = [
+    (
+        _partner_summary(r),
+        r['city'].lower(),
+        frozenset(c.lower() for c in r['cuisine_type']),
+        frozenset(d.lower() for d in r['dietary_options']),
+        _CAPACITY_RANK.get(r['capacity'].lower(), 0),
+    )
+    for r in RESTAURANT_PARTNERS_JSON
+]
+
+
+def _index_partners(keys_of) -> Dict[str, Set[int]]:
+    """Map each lowercase key to the positions in _PARTNER_FILTER_KEYS that have it."""
+    index: Dict[str, Set[int]] = {}
+    for position, entry in enumerate(_PARTNER_FILTER_KEYS):
+        for key in keys_of(entry):
+            index.setdefault(key, set()).add(position)
+    return index
+
+
+# Inverted indexes, so queries intersect small sets instead of scanning
+_PARTNERS_BY_CITY = _index_partners(lambda entry: (entry[1],))
+_PARTNERS_BY_CUISINE = _index_partners(lambda entry: entry[2])
+_PARTNERS_BY_DIETARY = _index_partners(lambda entry: entry[3])
+
+def _partner_names_by_area() -> Dict[Tuple[str, str], List[str]]:
+    """Map each (city, state) service area to its partner names, in data file order."""
+    names: Dict[Tuple[str, str], List[str]] = {}
+    for restaurant in RESTAURANT_PARTNERS_JSON:
+        names.setdefault((restaurant['city'], restaurant['state']), []).append(restaurant['name'])
+    return names
+
+
+_PARTNER_NAMES_BY_AREA = _partner_names_by_area()
+
+
+def _service_area_reply(area: Dict) -> str:
+    """Build check_service_area's answer for a served area."""
+    # Mention the first 3 partners from the data file
+    restaurants = _PARTNER_NAMES_BY_AREA.get((area['city'], area['state']), [])[:3]
+    
+    if restaurants:
+        partners_list = ", ".join(restaurants)
+        result = f"Great! We operate in {area['city']}, {area['state']} and have some great partners there including {partners_list}."
+    else:
+        result = f"Great! We operate in {area['city']}, {area['state']}."
+    
+    # Add coverage notes if available
+    if area.get('notes'):
+        result += f" We cover {area['notes']}."
+    
+    return result
+
+
+# The answer for a served area never changes, so build each one up front
+_SERVICE_AREA_REPLIES = {
+    (area['city'], area['state']): _service_area_reply(area)
+    for area in SERVICE_AREAS_JSON
+}
+
+
+@lru_cache(maxsize=512)
+def _find_service_area(city_lower: str) -> Optional[Dict]:
+    """Resolve lowercased city input to a service area entry, or None."""
+    # Exact names and aliases need only a dict lookup
+    name = _SERVICE_AREA_NAMES.get(city_lower)
+    if name is not None:
+        return _SERVICE_AREA_BY_CITY[name]
+    
+    # A whole name plus a state, which has to be the area's own state
+    match = _SERVICE_CITY_RE.fullmatch(city_lower)
+    if match:
+        name = match.group(1)
+        area = _SERVICE_AREA_BY_CITY[_SERVICE_AREA_NAMES[name]]
+        state = match.group(2).replace(".", "").strip()
+        for code in (area['state'], _ALIAS_STATES.get(name)):
+            if code and state in (code.lower(), _US_STATE_NAMES.get(code)):
+                return area
+        return None
+    
+    # Fall back to partial names, e.g. "san"
+    for name, area in _SERVICE_AREA_BY_CITY.items():
+        if city_lower in name:
+            return area
+    return None
+
 # ============================================================================
 # DATA MODELS (for type hinting and validation)
 # ============================================================================
 
-class RestaurantPartner(BaseModel):
+@dataclass(frozen=True, slots=True)
+class RestaurantPartner:
     """Model for restaurant partner information."""
     name: str
     city: str
@@ -50,7 +236,8 @@ class RestaurantPartner(BaseModel):
     capacity: str
     dietary_options: List[str]
 
-class ServiceArea(BaseModel):
+@dataclass(frozen=True, slots=True)
+class ServiceArea:
     """Model for service area information."""
     city: str
     state: str
@@ -58,7 +245,8 @@ class ServiceArea(BaseModel):
     restaurant_count: int
     notes: Optional[str] = None
 
-class Lead(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class Lead:
     """Model for captured leads."""
     contact_email: str
     contact_name: Optional[str] = None
@@ -69,19 +257,18 @@ class Lead(BaseModel):
     headcount: Optional[int] = None
     frequency: Optional[str] = None
     timing: Optional[str] = None
-    cuisine_preferences: List[str] = []
-    dietary_requirements: List[str] = []
+    cuisine_preferences: List[str] = field(default_factory=list)
+    dietary_requirements: List[str] = field(default_factory=list)
     qualification_status: str
     is_in_service_area: bool
     meets_minimum: bool
     notes: Optional[str] = None
 
 # ============================================================================
-# AGENT TOOLS (decorated with @tool for LangChain)
+# AGENT TOOLS (LangChain StructuredTools, with sync and async paths)
 # ============================================================================
 
-@tool
-def check_service_area(city: str) -> str:
+def _check_service_area(city: str) -> str:
     """Check if Meal Outpost serves a specific city and mention some restaurant partners.
     
     Args:
@@ -90,36 +277,47 @@ def check_service_area(city: str) -> str:
     Returns:
         Information about service availability with sample partners
     """
-    city_lower = city.lower().strip()
-    
-    # Search in JSON data for matching city
-    for area in SERVICE_AREAS_JSON:
-        if city_lower in area['city'].lower():
-            # Find restaurants in this city from JSON
-            restaurants = [
-                r['name'] for r in RESTAURANT_PARTNERS_JSON 
-                if r['city'] == area['city'] and r['state'] == area['state']
-            ][:3]  # Get first 3 restaurants
-            
-            # Build response
-            if restaurants:
-                partners_list = ", ".join(restaurants)
-                result = f"Great! We operate in {area['city']}, {area['state']} and have some great partners there including {partners_list}."
-            else:
-                result = f"Great! We operate in {area['city']}, {area['state']}."
-            
-            # Add coverage notes if available
-            if area.get('notes'):
-                result += f" We cover {area['notes']}."
-                
-            return result
+    area = _find_service_area(city.lower().strip())
     
     # City not found
-    return f"We don't currently serve {city.title()}, but we're always expanding! We'd love to stay in touch about your catering needs and can notify you when we expand to your area."
+    if area is None:
+        return f"We don't currently serve {city.title()}, but we're always expanding! We'd love to stay in touch about your catering needs and can notify you when we expand to your area."
+    
+    return _SERVICE_AREA_REPLIES[(area['city'], area['state'])]
+
+
+async def _acheck_service_area(city: str) -> str:
+    """Async path of check_service_area, a pure lookup run inline."""
+    return _check_service_area(city)
+
+
+# Both paths, so ToolNode's async path doesn't hop to a thread pool
+check_service_area = StructuredTool.from_function(
+    func=_check_service_area,
+    coroutine=_acheck_service_area,
+    name="check_service_area",
+)
+
+
+# Order-size tiers: below 10 people, below the minimum, at or above it.
+# The minimum is filled in once here, only the headcount varies per call.
+_ORDER_SIZE_TIERS = (10, MINIMUM_ORDER_SIZE)
 
+_ORDER_MINIMUM_REPLIES = tuple(
+    template.replace("{minimum}", str(MINIMUM_ORDER_SIZE))
+    for template in (
+        "Thank you for considering Meal Outpost! Our service works best for orders of {minimum}+ people. For {people_count} people, you might want to consider ordering directly from individual restaurants. If your catering needs grow in the future, we'd love to help!",
+        "Thanks for your interest! {people_count} people is below our typical minimum of {minimum} people per order. However, if you have recurring catering needs or multiple events planned, we'd still love to discuss how we might help.",
+        "Perfect! {people_count} people is a great size for us. We specialize in orders of {minimum}+ people and would be happy to help with your catering needs.",
+    )
+)
 
-@tool
-def check_order_minimum(people_count: int, order_frequency: str = "one-time") -> str:
+_RECURRING_BELOW_MINIMUM_REPLY = (
+    "While {people_count} people is below our typical minimum of {minimum}, we'd be happy to discuss your recurring catering needs. Recurring orders give us more flexibility with smaller group sizes."
+).replace("{minimum}", str(MINIMUM_ORDER_SIZE))
+
+
+def _check_order_minimum(people_count: int, order_frequency: str = "one-time") -> str:
     """Check if an order meets Meal Outpost's minimum requirements.
     
     Args:
@@ -129,23 +327,120 @@ def check_order_minimum(people_count: int, order_frequency: str = "one-time") ->
     Returns:
         Information about whether the order meets minimums and next steps
     """
-    minimum = 20
+    tier = bisect_right(_ORDER_SIZE_TIERS, people_count)
+    if tier == 1 and _RECURRING_FREQUENCY_RE.search(order_frequency.casefold()):
+        return _RECURRING_BELOW_MINIMUM_REPLY.format(people_count=people_count)
+    return _ORDER_MINIMUM_REPLIES[tier].format(people_count=people_count)
+
+
+async def _acheck_order_minimum(people_count: int, order_frequency: str = "one-time") -> str:
+    """Async path of check_order_minimum, a pure lookup run inline."""
+    return _check_order_minimum(people_count, order_frequency)
+
+
+check_order_minimum = StructuredTool.from_function(
+    func=_check_order_minimum,
+    coroutine=_acheck_order_minimum,
+    name="check_order_minimum",
+)
+
+
+# Logging-style template, only rendered when the record is actually emitted
+_LEAD_NOTIFICATION_TEMPLATE = """📧 NEW LEAD NOTIFICATION
+Email: %(email)s
+Details:
+%(details)s
+Sent to: sales@mealoutpost.com"""
+
+
+def _deliver_lead_notification(email: str, details: str) -> None:
+    """Deliver a lead notification to the sales team."""
+    # In production, this would send an actual email
+    # For now, just log the lead information
+    # The extra fields give log handlers the lead without parsing the message
+    logger.info(
+        _LEAD_NOTIFICATION_TEMPLATE,
+        {"email": email, "details": details},
+        extra={"lead_email": email, "lead_details": details},
+    )
+
+
+async def _dispatch_lead_notification(email: str, details: str) -> None:
+    """Deliver a lead notification from the background worker."""
+    # In production, the send would be awaited here
+    _deliver_lead_notification(email, details)
+
+
+# Pending notifications and the worker draining them, one pair per event loop
+# so each loop sends (and flushes) its own leads. An entry goes away when its
+# worker ends, e.g. cancelled as asyncio.run closes the loop.
+# event loop -> (queue, worker task)
+_notification_workers: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+async def _drain_lead_notifications(queue: asyncio.Queue) -> None:
+    """Send queued lead notifications one by one, for as long as the loop runs."""
+    while True:
+        email, details = await queue.get()
+        try:
+            await _dispatch_lead_notification(email, details)
+        except Exception:
+            # A failed send must not take the worker down with it
+            logger.exception("Failed to send lead notification for %s", email)
+        finally:
+            queue.task_done()
+
+
+def _enqueue_lead_notification(email: str, details: str) -> None:
+    """Queue a lead notification, starting this loop's worker if needed."""
+    loop = asyncio.get_running_loop()
+    entry = _notification_workers.get(loop)
     
-    if people_count >= minimum:
-        return f"Perfect! {people_count} people is a great size for us. We specialize in orders of {minimum}+ people and would be happy to help with your catering needs."
+    if entry is None or entry[1].done():
+        queue: asyncio.Queue = asyncio.Queue()
+        worker = loop.create_task(_drain_lead_notifications(queue))
+        
+        def forget(task: asyncio.Task) -> None:
+            current = _notification_workers.get(loop)
+            if current is not None and current[1] is task:
+                del _notification_workers[loop]
+        
+        worker.add_done_callback(forget)
+        entry = _notification_workers[loop] = (queue, worker)
     
-    elif people_count >= 10:
-        if "recurring" in order_frequency.lower() or "daily" in order_frequency.lower() or "weekly" in order_frequency.lower():
-            return f"While {people_count} people is below our typical minimum of {minimum}, we'd be happy to discuss your recurring catering needs. Recurring orders give us more flexibility with smaller group sizes."
-        else:
-            return f"Thanks for your interest! {people_count} people is below our typical minimum of {minimum} people per order. However, if you have recurring catering needs or multiple events planned, we'd still love to discuss how we might help."
+    entry[0].put_nowait((email, details))
+
+
+async def flush_lead_notifications() -> None:
+    """Wait until every lead notification queued in this event loop is sent.
     
-    else:
-        return f"Thank you for considering Meal Outpost! Our service works best for orders of {minimum}+ people. For {people_count} people, you might want to consider ordering directly from individual restaurants. If your catering needs grow in the future, we'd love to help!"
+    The async path of send_lead_notification replies before the send
+    happens. Await this before the event loop exits (e.g. at the end of a
+    script run with asyncio.run), otherwise the worker is cancelled and any
+    leads still queued are lost.
+    """
+    entry = _notification_workers.get(asyncio.get_running_loop())
+    if entry is not None and not entry[1].done():
+        await entry[0].join()
+
+
+def _normalize_lead_email(email: str) -> Optional[str]:
+    """Clean up a lead's email address, or None if it is malformed."""
+    email = email.strip()
+    if not _EMAIL_RE.fullmatch(email):
+        return None
+    
+    # Domains are case-insensitive, normalize so repeat leads look identical
+    local_part, _, domain = email.rpartition("@")
+    return f"{local_part}@{domain.lower()}"
+
 
+_INVALID_EMAIL_REPLY = "Hmm, {email} doesn't look like a valid email address. Could you double-check it so our sales team can reach you?"
 
-@tool 
-def send_lead_notification(email: str, details: str) -> str:
+_LEAD_SENT_REPLY = "Great! I've sent your information to our sales team. Someone will reach out to {email} within 24 hours to discuss options, pricing, and get you set up. Looking forward to serving you!"
+
+
+def _send_lead_notification(email: str, details: str) -> str:
     """Send a lead notification to the sales team with all gathered information.
     
     Args:
@@ -153,16 +448,39 @@ def send_lead_notification(email: str, details: str) -> str:
         details: Complete summary including location, headcount, timing, use case, and preferences
         
     Returns:
-        Confirmation that the lead was sent to the sales team
+        Confirmation that the lead was sent to the sales team, or a request
+        to double-check the email if it is malformed
     """
-    # In production, this would send an actual email
-    # For now, just log the lead information
-    print(f"📧 NEW LEAD NOTIFICATION")
-    print(f"Email: {email}")
-    print(f"Details:\n{details}")
-    print(f"Sent to: sales@mealoutpost.com")
+    # Skip the send entirely for malformed addresses
+    normalized = _normalize_lead_email(email)
+    if normalized is None:
+        return _INVALID_EMAIL_REPLY.format(email=email.strip())
     
-    return f"Great! I've sent your information to our sales team. Someone will reach out to {email} within 24 hours to discuss options, pricing, and get you set up. Looking forward to serving you!"
+    # Synchronous callers have no event loop to hand the send off to
+    _deliver_lead_notification(normalized, details)
+    
+    return _LEAD_SENT_REPLY.format(email=normalized)
+
+
+async def _asend_lead_notification(email: str, details: str) -> str:
+    """Async path of send_lead_notification, queues the send in the background."""
+    # Skip the send entirely for malformed addresses
+    normalized = _normalize_lead_email(email)
+    if normalized is None:
+        return _INVALID_EMAIL_REPLY.format(email=email.strip())
+    
+    # Deliver in the background so the reply isn't held up by the send
+    _enqueue_lead_notification(normalized, details)
+    
+    return _LEAD_SENT_REPLY.format(email=normalized)
+
+
+# Sync and async callers each get a native path
+send_lead_notification = StructuredTool.from_function(
+    func=_send_lead_notification,
+    coroutine=_asend_lead_notification,
+    name="send_lead_notification",
+)
 
 
 # ============================================================================
@@ -189,57 +507,94 @@ def get_restaurant_partners(
     Returns:
         List of matching restaurant partners
     """
-    city_lower = city.lower().strip()
+    # Canonicalize the query so equivalent requests share a cache entry
+    matches = _match_restaurant_partners(
+        city.lower().strip(),
+        frozenset(c.lower() for c in cuisine_type or ()),
+        frozenset(d.lower() for d in dietary_needs or ()),
+        _CAPACITY_RANK.get(capacity.lower(), 0) if capacity else 0,
+        limit,
+    )
+    
+    # Hand out copies so callers can't mutate the cached results
+    return [dict(match) for match in matches]
+
+
+@lru_cache(maxsize=512)
+def _match_restaurant_partners(
+    city_lower: str,
+    cuisine_lower: frozenset,
+    dietary_lower: frozenset,
+    required_capacity: int,
+    limit: int
+) -> Tuple[Dict, ...]:
+    """Filter restaurant partners for an already-normalized query."""
+    # Whole city names and aliases hit the city index directly;
+    # anything else is treated as a partial name
+    candidates = _PARTNERS_BY_CITY.get(_SERVICE_AREA_NAMES.get(city_lower, city_lower))
+    if candidates is None:
+        candidates = set().union(
+            *(positions for name, positions in _PARTNERS_BY_CITY.items() if city_lower in name)
+        )
+    
+    # Check cuisine type if specified (any requested cuisine qualifies)
+    if cuisine_lower:
+        candidates = candidates & set().union(
+            *(_PARTNERS_BY_CUISINE.get(c, ()) for c in cuisine_lower)
+        )
+    
+    # Check dietary needs if specified (any requested option qualifies)
+    if dietary_lower:
+        candidates = candidates & set().union(
+            *(_PARTNERS_BY_DIETARY.get(d, ()) for d in dietary_lower)
+        )
+    
     matches = []
     
-    for restaurant in RESTAURANT_PARTNERS_JSON:
-        # Check city match
-        if city_lower not in restaurant['city'].lower():
-            continue
-        
-        # Check cuisine type if specified
-        if cuisine_type:
-            cuisine_match = any(
-                c.lower() in [ct.lower() for ct in restaurant['cuisine_type']]
-                for c in cuisine_type
-            )
-            if not cuisine_match:
-                continue
-        
-        # Check dietary needs if specified
-        if dietary_needs:
-            has_dietary_options = any(
-                d.lower() in [do.lower() for do in restaurant['dietary_options']]
-                for d in dietary_needs
-            )
-            if not has_dietary_options:
-                continue
+    # Walk survivors in data file order
+    for position in sorted(candidates):
+        summary, _, _, _, capacity_rank = _PARTNER_FILTER_KEYS[position]
         
         # Check capacity if specified
-        if capacity:
-            capacity_order = {"small": 1, "medium": 2, "large": 3}
-            if capacity_order.get(capacity.lower(), 0) > capacity_order.get(restaurant['capacity'].lower(), 0):
-                continue
+        if required_capacity > capacity_rank:
+            continue
         
-        matches.append({
-            "name": restaurant['name'],
-            "cuisine": ", ".join(restaurant['cuisine_type']),
-            "description": restaurant['description'],
-            "capacity": restaurant['capacity'],
-            "dietary_options": ", ".join(restaurant['dietary_options'])
-        })
+        matches.append(summary)
         
         if len(matches) >= limit:
             break
     
-    return matches
+    return tuple(matches)
+
+
+# Lead scoring weights: (points, reason) per factor
+_SERVICE_AREA_WEIGHTS = {
+    True: (50, "In service area"),
+    False: (0, "Outside current service area"),
+}
+
+# Indexed by headcount tier: small, substantial, meets the minimum
+_HEADCOUNT_WEIGHTS = (
+    (0, "Small order size ({headcount} people)"),
+    (15, "Below preferred minimum but substantial ({headcount} people)"),
+    (30, "Meets minimum size ({headcount} people)"),
+)
+
+_NEED_WEIGHTS = {
+    "recurring": (20, "Recurring need (high value)"),
+    "one-time": (10, "One-time event"),
+}
+
+# Scores of 40+ are worth a look, 70+ are qualified
+_QUALIFICATION_THRESHOLDS = (40, 70)
+_QUALIFICATION_STATUSES = ("Not Qualified", "Maybe", "Qualified")
 
 
 def calculate_lead_score(
     is_in_service_area: bool,
     headcount: Optional[int],
     user_need: Optional[str],
-    minimum_order_size: int = 20
+    minimum_order_size: int = MINIMUM_ORDER_SIZE
 ) -> Dict:
     """
     Calculate lead qualification score.
@@ -253,42 +608,30 @@ def calculate_lead_score(
     Returns:
         Dict with qualification status and reasoning
     """
-    score = 0
-    reasons = []
-    
     # Service area check (highest weight)
-    if is_in_service_area:
-        score += 50
-        reasons.append("In service area")
-    else:
-        reasons.append("Outside current service area")
+    score, reason = _SERVICE_AREA_WEIGHTS[bool(is_in_service_area)]
+    reasons = [reason]
     
     # Headcount check
     if headcount:
         if headcount >= minimum_order_size:
-            score += 30
-            reasons.append(f"Meets minimum size ({headcount} people)")
+            tier = 2
         elif headcount >= 10:
-            score += 15
-            reasons.append(f"Below preferred minimum but substantial ({headcount} people)")
+            tier = 1
         else:
-            reasons.append(f"Small order size ({headcount} people)")
+            tier = 0
+        points, reason = _HEADCOUNT_WEIGHTS[tier]
+        score += points
+        reasons.append(reason.format(headcount=headcount))
     
     # Need type
-    if user_need == "recurring":
-        score += 20
-        reasons.append("Recurring need (high value)")
-    elif user_need == "one-time":
-        score += 10
-        reasons.append("One-time event")
+    need = _NEED_WEIGHTS.get(user_need)
+    if need is not None:
+        score += need[0]
+        reasons.append(need[1])
     
     # Determine qualification status
-    if score >= 70:
-        status = "Qualified"
-    elif score >= 40:
-        status = "Maybe"
-    else:
-        status = "Not Qualified"
+    status = _QUALIFICATION_STATUSES[bisect_right(_QUALIFICATION_THRESHOLDS, score)]
     
     return {
         "status": status,
@@ -298,6 +641,34 @@ def calculate_lead_score(
     }
 
 
+def batch_calculate_lead_scores(
+    leads: Sequence[Lead],
+    minimum_order_size: int = MINIMUM_ORDER_SIZE
+) -> List[Dict]:
+    """
+    Score many captured leads at once, e.g. after batch qualification.
+    
+    Leads with the same service area, headcount and need share one score
+    computation, and each gets its own copy of the result.
+    
+    Args:
+        leads: Captured leads to score
+        minimum_order_size: Minimum order size threshold
+        
+    Returns:
+        One calculate_lead_score result per lead, in input order
+    """
+    scored: Dict[Tuple, Dict] = {}
+    results = []
+    for lead in leads:
+        key = (bool(lead.is_in_service_area), lead.headcount, lead.user_need)
+        result = scored.get(key)
+        if result is None:
+            result = scored[key] = calculate_lead_score(*key, minimum_order_size)
+        results.append({**result, "reasons": list(result["reasons"])})
+    return results
+
+
 def _get_recommendation(status: str, reasons: List[str]) -> str:
     """Generate routing recommendation based on qualification."""
     if status == "Qualified":
@@ -308,30 +679,34 @@ def _get_recommendation(status: str, reasons: List[str]) -> str:
         return "Capture information for future follow-up when expanding"
 
 
-def get_business_rules() -> Dict:
+@cache
+def get_business_rules() -> Mapping:
     """
     Get current business rules for lead qualification.
     
+    The rules don't change while the process runs, so they are built once
+    and every caller shares the same read-only mapping.
+    
     Returns:
-        Dict with business rules
+        Read-only mapping with business rules
     """
-    return {
-        "minimum_order_size": 20,
-        "lead_time_hours": {
+    return MappingProxyType({
+        "minimum_order_size": MINIMUM_ORDER_SIZE,
+        "lead_time_hours": MappingProxyType({
             "one_time": 48,
             "recurring_setup": 168  # 1 week
-        },
-        "service_areas": [area['city'] for area in SERVICE_AREAS_JSON],
-        "delivery_fees": {
+        }),
+        "service_areas": tuple(area['city'] for area in SERVICE_AREAS_JSON),
+        "delivery_fees": MappingProxyType({
             "small_market": "$40-60",
             "medium_market": "$50-70",
             "large_market": "$60-90"
-        },
-        "qualification_thresholds": {
+        }),
+        "qualification_thresholds": MappingProxyType({
             "qualified_score": 70,
             "maybe_score": 40
-        }
-    }
+        })
+    })
 
 
 def extract_contact_info(text: str) -> Dict:
@@ -351,15 +726,11 @@ def extract_contact_info(text: str) -> Dict:
         "name": None
     }
     
-    # Email pattern
-    email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-    email_match = re.search(email_pattern, text)
+    email_match = _EMAIL_RE.search(text)
     if email_match:
         result["email"] = email_match.group(0)
     
-    # Phone pattern (US format)
-    phone_pattern = r'\b(?:\+?1[-.]?)?\(?([0-9]{3})\)?[-.]?([0-9]{3})[-.]?([0-9]{4})\b'
-    phone_match = re.search(phone_pattern, text)
+    phone_match = _PHONE_RE.search(text)
     if phone_match:
         result["phone"] = phone_match.group(0)
     
@@ -371,15 +742,17 @@ def extract_contact_info(text: str) -> Dict:
 # ============================================================================
 
 __all__ = [
-    # Agent tools (decorated with @tool)
+    # Agent tools (LangChain StructuredTools)
     "check_service_area",
     "check_order_minimum",
     "send_lead_notification",
     # Helper functions
     "get_restaurant_partners",
     "calculate_lead_score",
+    "batch_calculate_lead_scores",
     "get_business_rules",
     "extract_contact_info",
+    "flush_lead_notifications",
     # Data models
     "RestaurantPartner",
     "ServiceArea",